@@ -1,2 +1,6 @@
 CORRUPTED = "CORRUPTED STREAM"
 OK = "OK"
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_SOI = b"\xff\xd8"
+# Start-of-frame markers (excluding DHT, JPG and DAC)
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
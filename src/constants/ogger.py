@@ -11,3 +11,6 @@ BITRATE_QUALITY_MAP = {
     9: 320000,
     10: 499000,
 }
+
+# Bump whenever generate_fingerprint changes, so cached fingerprints are discarded
+FINGERPRINT_VERSION = 1
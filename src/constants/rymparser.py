@@ -0,0 +1,14 @@
+# Rymparser state flags, one bit each
+F_ALBUM = 1 << 0
+F_ALBUM_NAME = 1 << 1
+F_DATE = 1 << 2
+F_RATING = 1 << 3
+F_LABEL = 1 << 4
+F_OWNERSHIP = 1 << 5
+F_GENRE_LINK = 1 << 6
+F_LABEL_CATALOGNR = 1 << 7
+F_CREDITED_NAME = 1 << 8
+F_ARTIST = 1 << 9
+F_COLLAB = 1 << 10
+F_TAGCLOUD = 1 << 11
+F_TAG = 1 << 12
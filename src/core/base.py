@@ -39,6 +39,9 @@ class BaseProcessor(ABC):
         )
         self.lock = threading.Lock()
 
+        # Bound once so per-file stop checks are a single call
+        self._is_stopped = self.stop_flag.is_set if self.stop_flag else lambda: False
+
         # Main directory
         self.main_dir = Path(
             get_config(config, "main_dir", expected_type=str, optional=False)
@@ -84,7 +87,7 @@ class BaseProcessor(ABC):
     def process_all(self):
         """Process all items in parallel."""
         parallel_map(
-            func=self.process_file,
+            func=self._process_unless_stopped,
             items_with_args=self.files,
             max_workers=self.max_workers,
             stop_flag=self.stop_flag,
@@ -93,6 +96,12 @@ class BaseProcessor(ABC):
             unit="files",
         )
 
+    def _process_unless_stopped(self, file):
+        """Skip files still queued once a stop has been requested."""
+        if self._is_stopped():
+            return None
+        return self.process_file(file)
+
     def summary(self):
         """Summarise activities recorded in self.stats."""
         self.stats.stop_timer()
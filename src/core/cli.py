@@ -1,43 +1,148 @@
+import os
 import sys
+import codecs
+import copy
+import queue
 import shutil
 import threading
-import importlib.util
+import importlib
 import ast
+import re
+from functools import lru_cache
 from pprint import pformat
 
 import yaml
 
-from constants.globals import ROOT, MODULES_DIR, CONFIG_PATH, BANNER
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+from constants.globals import ROOT, MODULES_DIR, CONFIG_PATH
 from utils.helpers import setup_logger
 
 
+_LITERALS = {
+    "true": True,
+    "True": True,
+    "false": False,
+    "False": False,
+    "null": None,
+    "none": None,
+    "None": None,
+}
+# Plain decimal numbers as literal_eval reads them: no leading zeros or underscores
+_INT = re.compile(r"-?(?:0|[1-9][0-9]*)")
+_FLOAT = re.compile(r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]*)?(?:[eE][-+]?[0-9]+)?")
+_NOT_FAST = object()
+
+
+def _fast_literal(s: str):
+    """
+    Recognise booleans, None, numbers and plain quoted strings without the parser.
+    Returns _NOT_FAST for anything else.
+    """
+    if s in _LITERALS:
+        return _LITERALS[s]
+    if _INT.fullmatch(s):
+        return int(s)
+    if _FLOAT.fullmatch(s):
+        return float(s)
+
+    quote = s[:1]
+    if quote not in ("'", '"') or len(s) < 2 or s[-1] != quote:
+        return _NOT_FAST
+    body = s[1:-1]
+    # Escapes and inner quotes are left to literal_eval
+    if quote in body or "\\" in body:
+        return _NOT_FAST
+    return body
+
+
+@lru_cache(maxsize=256)
+def _parse_value(value_str: str):
+    """
+    Convert an override value to a Python literal, or keep it as a string.
+    Results are cached since the menu loop re-parses the same overrides.
+    """
+    value = _fast_literal(value_str)
+    if value is not _NOT_FAST:
+        return value
+    try:
+        return ast.literal_eval(value_str)
+    except (ValueError, SyntaxError):
+        return value_str
+
+
+def _find_pycache_dirs(root) -> list[str]:
+    """
+    Find __pycache__ directories under root with os.scandir.
+    Symlinks and the __pycache__ directories themselves are not descended into.
+    """
+    found = []
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                    if entry.name == "__pycache__":
+                        found.append(entry.path)
+                    else:
+                        stack.append(entry.path)
+        except OSError:
+            continue
+    return found
+
+
 class App:
     """Application class that dynamically loads and runs discovered modules."""
 
     def __init__(self):
-        # Banner
-        print(BANNER)
-
-        # Ensure dynamically loaded scripts can be imported
-        sys.path.insert(0, str(MODULES_DIR))
-
         # Initialise config and scripts
         self.config = {}
         self.scripts = {}
 
+        # Parsed config cache: (mtime_ns, size, parsed)
+        self._config_cache = None
+
+        # Discovered scripts per module file: {filename: ((mtime_ns, size), scripts)}
+        self._discovery_cache = {}
+        # (filename, (mtime_ns, size)) of every module file and the scripts found
+        self._scripts_signature = None
+        self._scripts_cache = {}
+
+        # Stdin is read by one daemon thread for the app's lifetime
+        self._input_queue = queue.Queue()
+        self._input_listener = None
+
+        # Formatted menu, rebuilt when the discovered scripts change
+        self._menu_cache_key = None
+        self._menu = ([], "")
+
     def load_config(self) -> dict:
         """
         Load YAML configuration file with error handling.
         Raises FileNotFoundError if the config file does not exist.
         Returns an empty dict on YAML parsing failure.
+        The parsed config is cached until the file's mtime or size changes.
         """
         if not CONFIG_PATH.is_file():
             raise FileNotFoundError(
                 "config.yaml not found in the parent directory of main.py."
             )
         try:
-            with open(CONFIG_PATH, "r", encoding="utf-8") as file:
-                return yaml.safe_load(file) or {}
+            st = CONFIG_PATH.stat()
+            key = (st.st_mtime_ns, st.st_size)
+            if self._config_cache and self._config_cache[:2] == key:
+                return copy.deepcopy(self._config_cache[2])
+
+            with open(CONFIG_PATH, "rb") as file:
+                parsed = yaml.load(file, Loader=_YamlLoader) or {}
+            self._config_cache = (*key, parsed)
+            # Callers mutate the returned config (e.g. overrides)
+            return copy.deepcopy(parsed)
         except yaml.YAMLError as e:
             print(f"Failed to parse YAML config: {e}")
         except Exception as e:
@@ -57,10 +162,10 @@ class App:
             key_path, value_str = item.split("=", 1)
             keys = key_path.split(".")
 
-            try:
-                value = ast.literal_eval(value_str)
-            except (ValueError, SyntaxError):
-                value = value_str
+            value = _parse_value(value_str)
+            if isinstance(value, (list, dict, set)):
+                # Cached containers are shared, so hand the config its own copy
+                value = copy.deepcopy(value)
 
             current = overrides
             for key in keys[:-1]:
@@ -78,49 +183,116 @@ class App:
         while stack:
             base, updates = stack.pop()
             for k, v in updates.items():
-                if isinstance(v, dict) and isinstance(base.get(k), dict):
-                    stack.append((base[k], v))
-                else:
-                    base[k] = v
+                if isinstance(v, dict):
+                    existing = base.get(k)
+                    if isinstance(existing, dict):
+                        stack.append((existing, v))
+                        continue
+                base[k] = v
 
     def discover_scripts(self) -> dict:
+        """
+        Discover runnable classes in the modules directory.
+        Modules are only executed again when their mtime or size changes, and
+        the previous result is returned as-is if no module file changed.
+        """
+        # Ensure dynamically loaded scripts can be imported
+        if str(MODULES_DIR) not in sys.path:
+            sys.path.insert(0, str(MODULES_DIR))
+
+        module_files = []
+        with os.scandir(MODULES_DIR) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".py") or not entry.is_file():
+                    continue
+
+                # Private helper modules (e.g. _rymparser) never define scripts
+                if entry.name.startswith("_"):
+                    continue
+
+                st = entry.stat()
+                key = (st.st_mtime_ns, st.st_size)
+                module_files.append((entry.name, entry.path, key))
+
+        signature = frozenset((name, key) for name, _, key in module_files)
+        if signature == self._scripts_signature:
+            return self._scripts_cache
+
         scripts = {}
+        discovery_cache = {}
+        for name, path, key in module_files:
+            cached = self._discovery_cache.get(name)
+            if cached and cached[0] == key:
+                module_scripts = cached[1]
+            else:
+                module_scripts = self._load_module_scripts(name[:-3], path, key)
+                if module_scripts is None:
+                    continue
 
-        for file in MODULES_DIR.glob("*.py"):
-            module_name = file.stem
-            try:
-                spec = importlib.util.spec_from_file_location(module_name, file)
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
+            discovery_cache[name] = (key, module_scripts)
+            scripts.update(module_scripts)
 
-                for attr in dir(module):
-                    obj = getattr(module, attr)
+        self._discovery_cache = discovery_cache
+        self._scripts_signature = signature
+        self._scripts_cache = scripts
+        return scripts
 
-                    if not isinstance(obj, type):
-                        continue
+    def _load_module_scripts(
+        self, module_name: str, path: str, key: tuple[int, int]
+    ) -> dict | None:
+        """
+        Import a module from MODULES_DIR and collect its runnable classes.
+        Modules already in sys.modules are reused unless their file changed.
+        Returns None if the module fails to load.
+        """
+        scripts = {}
+        try:
+            module = sys.modules.get(module_name)
+            if (
+                getattr(module, "__file__", None) == path
+                and getattr(module, "__file_key__", None) != key
+            ):
+                # Changed on disk: import afresh, as reload() would keep stale classes
+                del sys.modules[module_name]
+                module = None
+
+            if module is None:
+                # Pick up files added since the import system last listed the folder
+                importlib.invalidate_caches()
+                module = importlib.import_module(module_name)
+
+            module_file = getattr(module, "__file__", None)
+            if module_file != path:
+                raise ImportError(f"shadowed by {module_file or module_name}")
+            module.__file_key__ = key
+
+            for obj in vars(module).values():
+                # Only include classes defined in this module
+                if not isinstance(obj, type) or obj.__module__ != module_name:
+                    continue
+
+                # run() may be inherited (e.g. from BaseProcessor)
+                if not callable(getattr(obj, "run", None)):
+                    continue
+
+                # Skip classes explicitly marked as placeholders
+                if getattr(obj, "placeholder", False):
+                    continue
+
+                scripts[obj.__name__] = {
+                    "class": obj,
+                    "module": module_name,
+                    "class_name": obj.__name__,
+                    "doc": (
+                        (obj.__doc__ or "").strip().splitlines()[0]
+                        if obj.__doc__
+                        else ""
+                    ),
+                }
 
-                    if callable(getattr(obj, "run", None)):
-                        # Only include classes defined in this module
-                        if obj.__module__ != module_name:
-                            continue
-
-                        # Skip classes explicitly marked as placeholders
-                        if getattr(obj, "placeholder", False):
-                            continue
-
-                        scripts[obj.__name__] = {
-                            "class": obj,
-                            "module": module_name,
-                            "class_name": obj.__name__,
-                            "doc": (
-                                (obj.__doc__ or "").strip().splitlines()[0]
-                                if obj.__doc__
-                                else ""
-                            ),
-                        }
-
-            except Exception as e:
-                print(f"Failed to load {module_name}: {e}")
+        except Exception as e:
+            print(f"Failed to load {module_name}: {e}")
+            return None
 
         return scripts
 
@@ -151,7 +323,7 @@ class App:
             # Confirm step
             if confirm:
                 answer = (
-                    input(
+                    self.read_input(
                         f"{pformat(script_args, indent=2, width=80, sort_dicts=True)}\nRun {name} with the above config? (Y/n): "
                     )
                     .strip()
@@ -167,6 +339,9 @@ class App:
 
             instance = cls(**script_args)
 
+            # Make sure 'q' can be read while the script runs
+            self._start_input_listener()
+
             # Define the thread that runs the script
             def script_target():
                 try:
@@ -178,32 +353,108 @@ class App:
                         f"An error occurred while running '{name}'. Check the logs for details."
                     )
 
-            # Thread that listens for 'q'
-            def input_listener():
-                while not stop_flag.is_set():
-                    user_input = input()
-                    if user_input.strip().lower() == "q":
-                        print("Stopping script...")
-                        stop_flag.set()
-                        break
-
-            # Run threads
+            # Run script and watch the shared input listener for 'q'
             script_thread = threading.Thread(target=script_target)
-            listener_thread = threading.Thread(target=input_listener)
-
             script_thread.start()
-            listener_thread.start()
+
+            while script_thread.is_alive():
+                try:
+                    user_input = self._input_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if user_input is None:
+                    # Keep EOF visible to later readers
+                    self._input_queue.put(None)
+                    break
+                if user_input.strip().lower() == "q" and not stop_flag.is_set():
+                    print("Stopping script...")
+                    stop_flag.set()
 
             script_thread.join()
             stop_flag.set()
-            print("Press Enter to return to main menu.")
-            listener_thread.join()
 
         except Exception:
             logger.exception(f"An error occurred while launching script '{name}'")
             print(
                 f"An error occurred while launching '{name}'. Check the logs for details."
             )
+        finally:
+            # Write out buffered log records before returning to the menu
+            for handler in logger.handlers:
+                handler.flush()
+
+    def read_input(self, prompt: str = "") -> str:
+        """
+        Read a line from stdin through the shared input listener.
+        Raises EOFError once stdin is closed.
+        """
+        self._start_input_listener()
+        print(prompt, end="", flush=True)
+        line = self._input_queue.get()
+        if line is None:
+            # Keep EOF visible to later readers
+            self._input_queue.put(None)
+            raise EOFError
+        return line
+
+    def _start_input_listener(self):
+        """
+        Start the single daemon thread that forwards stdin lines to the input queue.
+        """
+        if self._input_listener is not None:
+            return
+
+        def input_listener():
+            # Read the file descriptor directly so the thread never holds the
+            # sys.stdin buffer lock (a process forked meanwhile would inherit it)
+            try:
+                fd = sys.stdin.fileno()
+            except (AttributeError, ValueError, OSError):
+                self._input_queue.put(None)
+                return
+
+            encoding = getattr(sys.stdin, "encoding", None) or "utf-8"
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            pending = ""
+            while True:
+                try:
+                    chunk = os.read(fd, 4096)
+                except OSError:
+                    break
+                if not chunk:
+                    break
+                pending += decoder.decode(chunk)
+                *lines, pending = pending.split("\n")
+                for line in lines:
+                    self._input_queue.put(line.rstrip("\r"))
+
+            pending += decoder.decode(b"", final=True)
+            if pending:
+                self._input_queue.put(pending.rstrip("\r"))
+            self._input_queue.put(None)
+
+        self._input_listener = threading.Thread(target=input_listener, daemon=True)
+        self._input_listener.start()
+
+    def menu(self) -> tuple[list, str]:
+        """
+        Return the scripts sorted by name and the formatted menu text.
+        Both are cached until the discovered scripts change.
+        """
+        key = self._scripts_signature
+        if key != self._menu_cache_key:
+            indexed_names = sorted(self.scripts.items())
+            lines = []
+            for i, (_, info) in enumerate(indexed_names, start=1):
+                description = info.get("doc", "")
+                display_name = info["class_name"]
+                if description:
+                    display_name += f": {description}"
+                lines.append(f"  [{i}] {display_name}")
+
+            self._menu_cache_key = key
+            self._menu = (indexed_names, "\n".join(lines))
+        return self._menu
 
     def refresh(self):
         """
@@ -215,13 +466,15 @@ class App:
     def clear_caches(self):
         """
         Clear Python's cache after quitting.
+        __pycache__ directories are only removed if General.clear_pycache_on_exit is set.
         """
         # Clear all __pycache__ directories
-        for pycache_dir in ROOT.rglob("__pycache__"):
-            try:
-                shutil.rmtree(pycache_dir)
-            except Exception as e:
-                print(f"Error clearing cache at {pycache_dir}: {e}")
+        if self.config.get("General", {}).get("clear_pycache_on_exit", False):
+            for pycache_dir in _find_pycache_dirs(ROOT):
+                try:
+                    shutil.rmtree(pycache_dir)
+                except Exception as e:
+                    print(f"Error clearing cache at {pycache_dir}: {e}")
 
         # Clear sys.modules cache
         for module_name in list(sys.modules.keys()):
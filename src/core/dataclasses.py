@@ -1,4 +1,4 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from typing import Any, Optional
 import time
 
@@ -27,28 +27,36 @@ class Stats:
         raise AttributeError(f"'Stats' object has no attribute '{name}'")
 
     def __setattr__(self, name: str, value: Any):
-        if name in self.__annotations__ or name.startswith("_"):
-            super().__setattr__(name, value)
+        if name in _DECLARED_FIELDS or name[0] == "_":
+            object.__setattr__(self, name, value)
         else:
             self._custom[name] = value
 
     def start_timer(self):
-        self.start_time = time.time()
+        self.start_time = time.perf_counter()
         self.end_time = None
 
     def stop_timer(self):
         if self.start_time is not None:
-            self.end_time = time.time()
+            self.end_time = time.perf_counter()
         else:
             print("Cannot stop timer as it was never started.")
 
     def get_elapsed_time(self) -> Optional[float]:
         if self.start_time is None:
             return None
-        return (self.end_time or time.time()) - self.start_time
+        return (self.end_time or time.perf_counter()) - self.start_time
 
     def reset(self):
-        for key, value in vars(self).items():
+        for key in _FIELDS:
+            value = getattr(self, key)
+            if isinstance(value, list):
+                value.clear()
+            else:
+                setattr(self, key, None)
+
+        # Custom stats keep their keys so modules can keep using them
+        for key, value in self._custom.items():
             if isinstance(value, (list, dict, set)):
                 value.clear()
             elif hasattr(value, "reset") and callable(value.reset):
@@ -57,21 +65,21 @@ class Stats:
                 except Exception as e:
                     print(f"Failed to reset {key}: {e}")
             else:
-                setattr(self, key, None)
+                self._custom[key] = None
 
     def to_dict(self) -> dict:
-        result = {}
-        for key, value in vars(self).items():
-            if key == "custom":
-                continue  # Handle separately
-            try:
-                result[key] = value
-            except Exception as e:
-                result[key] = f"Error: {e}"
+        result = {key: getattr(self, key) for key in _FIELDS}
 
         # Add dynamic elapsed time
         result["elapsed_time"] = self.get_elapsed_time()
 
         # Add custom stats
-        result.update(self.custom)
+        result.update(self._custom)
         return result
+
+
+# Declared fields are set as attributes; anything else goes to _custom
+_DECLARED_FIELDS = frozenset(Stats.__annotations__)
+
+# Declared stats reported by to_dict and cleared by reset, in declaration order
+_FIELDS = tuple(f.name for f in fields(Stats) if f.name[0] != "_")
@@ -1,5 +1,6 @@
 import argparse
 
+from constants.globals import BANNER
 from core.cli import App
 
 
@@ -18,8 +19,15 @@ def main():
     )
 
     args = parser.parse_args()
+    print(BANNER)
     app = App()
 
+    def refresh():
+        """Reload config and scripts (cheap when unchanged) and reapply overrides."""
+        app.refresh()
+        if args.override:
+            app.deep_update_config(app.parse_overrides(args.override))
+
     def get_script_name_case_insensitive(user_input):
         lower_input = user_input.lower()
         for name in app.scripts:
@@ -28,14 +36,9 @@ def main():
         return None
 
     try:
-        app.refresh()
-
-        # Apply overrides if provided
-        if args.override:
-            overrides = app.parse_overrides(args.override)
-            app.deep_update_config(overrides)
-
         if args.scripts_to_run:
+            # Load config and scripts, applying overrides if provided
+            refresh()
             for script_name_input in args.scripts_to_run:
                 matched_name = get_script_name_case_insensitive(script_name_input)
                 if matched_name:
@@ -47,20 +50,12 @@ def main():
             # Interactive menu
             while True:
                 print(f"{'='*100}\nWelcome back!\n{'='*100}\n\nAvailable scripts:")
-                app.refresh()
-
-                if args.override:
-                    app.deep_update_config(app.parse_overrides(args.override))
+                refresh()
 
-                indexed_names = sorted(app.scripts.items())
-                for i, (_, info) in enumerate(indexed_names, start=1):
-                    description = info.get("doc", "")
-                    display_name = info["class_name"]
-                    if description:
-                        display_name += f": {description}"
-                    print(f"  [{i}] {display_name}")
+                indexed_names, menu = app.menu()
+                print(menu)
 
-                script_input = input(
+                script_input = app.read_input(
                     "\nEnter script number or class name (or press Enter to quit): "
                 ).strip()
 
@@ -82,7 +77,8 @@ def main():
                         print(f"Script '{script_input}' not found.")
                         continue
 
-                app.refresh()
+                # Pick up edits made while the menu was open
+                refresh()
                 app.run_script(script_name)
     finally:
         # Ensure caches are cleared before quitting
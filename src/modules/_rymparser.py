@@ -1,28 +1,38 @@
+import sys
 from html.parser import HTMLParser
-import re
+
+from constants.rymparser import (
+    F_ALBUM,
+    F_ALBUM_NAME,
+    F_ARTIST,
+    F_COLLAB,
+    F_CREDITED_NAME,
+    F_DATE,
+    F_GENRE_LINK,
+    F_LABEL,
+    F_LABEL_CATALOGNR,
+    F_OWNERSHIP,
+    F_RATING,
+    F_TAG,
+    F_TAGCLOUD,
+)
 
 
 class Rymparser(HTMLParser):
     """Parses RYM collection HTML."""
 
+    # Link flags, with the dict attribute and key that collect their text
+    _LINK_TARGETS = (
+        (F_ARTIST, "current_artist", "artist_name"),
+        (F_ALBUM_NAME, "current_album_name", "album_title"),
+        (F_LABEL, "current_label", "label_name"),
+        (F_GENRE_LINK, "current_genre", "genre_name"),
+    )
+
     # TODO: fix catalog number
     def __init__(self):
         super().__init__()
-        self.flags = {
-            "album": False,
-            "album_name": False,
-            "date": False,
-            "rating": False,
-            "label": False,
-            "ownership": False,
-            "genre_link": False,
-            "label_catalognr": False,
-            "credited_name": False,
-            "artist": False,
-            "collab": False,
-            "tagcloud": False,
-            "tag": False,
-        }
+        self.flags = 0
         self.albums = []
 
         self.just_saw_label_link = False
@@ -57,10 +67,10 @@ class Rymparser(HTMLParser):
         attrs_dict = dict(attrs)
 
         if tag == "tr" and attrs_dict.get("id", "").startswith("page_catalog_item_"):
-            self.flags["album"] = True
+            self.flags |= F_ALBUM
             self.reset_current_album()
 
-        if not self.flags["album"]:
+        if not self.flags & F_ALBUM:
             return
 
         title = attrs_dict.get("title", "")
@@ -69,135 +79,141 @@ class Rymparser(HTMLParser):
         if tag == "a" and title:
             self._handle_start_a_tag(title)
 
-        elif tag == "a" and self.flags["tagcloud"]:
-            self.flags["tag"] = True  # Temporary flag just for one tag link
+        elif tag == "a" and self.flags & F_TAGCLOUD:
+            self.flags |= F_TAG  # Temporary flag just for one tag link
 
         elif tag == "div" and "or_q_tagcloud" in class_attr:
-            self.flags["tagcloud"] = True
+            self.flags |= F_TAGCLOUD
 
         elif tag == "span" and "smallgray" in class_attr:
-            self.flags["date"] = True
+            self.flags |= F_DATE
 
         elif tag == "span" and "credited_name" in class_attr:
-            self.flags["credited_name"] = True
-            self.flags["collab"] = True
+            self.flags |= F_CREDITED_NAME | F_COLLAB
 
         elif tag == "td":
             self._handle_start_td_tag(class_attr)
 
         elif tag == "div" and "smallgray" in class_attr:
-            self.flags["label_catalognr"] = True
+            self.flags |= F_LABEL_CATALOGNR
 
     def _handle_start_a_tag(self, title: str):
         id_extracted = self._extract_id(title, include_brackets=True)
 
         if "Artist" in title:
-            self.flags["artist"] = True
+            self.flags |= F_ARTIST
             self.current_artist = {"artist_name": None, "artist_id": id_extracted}
         elif "Album" in title:
-            self.flags["album_name"] = True
+            self.flags |= F_ALBUM_NAME
             self.current_album_name = {"album_title": None, "album_id": id_extracted}
         elif "Genre" in title:
-            self.flags["genre_link"] = True
+            self.flags |= F_GENRE_LINK
             self.current_genre = {"genre_name": None, "genre_id": id_extracted}
         elif "Label" in title:
-            self.flags["label"] = True
+            self.flags |= F_LABEL
             self.just_saw_label_link = True
             self.current_label = {"label_name": None, "label_id": id_extracted}
 
     def _handle_start_td_tag(self, class_attr: str):
         if "or_q_rating" in class_attr:
-            self.flags["rating"] = True
+            self.flags |= F_RATING
         elif "or_q_ownership" in class_attr:
-            self.flags["ownership"] = True
+            self.flags |= F_OWNERSHIP
 
     def handle_endtag(self, tag: str):
-        if tag == "tr" and self.flags["album"]:
+        if tag == "tr" and self.flags & F_ALBUM:
             self._finalize_current_album()
-            self.flags["album"] = False
+            self.flags &= ~F_ALBUM
 
-        if not self.flags["album"]:
+        if not self.flags & F_ALBUM:
             return
 
         if tag == "a":
             self._handle_end_a_tag()
         elif tag == "span":
-            self.flags["date"] = False
-            self.flags["credited_name"] = False
-            self.flags["collab"] = False
+            self.flags &= ~(F_DATE | F_CREDITED_NAME | F_COLLAB)
         elif tag == "td":
-            self.flags["rating"] = False
-            self.flags["ownership"] = False
+            self.flags &= ~(F_RATING | F_OWNERSHIP)
         elif tag == "div":
-            self.flags["label_catalognr"] = False
+            self.flags &= ~F_LABEL_CATALOGNR
 
-        if tag == "div" and self.flags["tagcloud"]:
-            self.flags["tagcloud"] = False
+        if tag == "div" and self.flags & F_TAGCLOUD:
+            self.flags &= ~F_TAGCLOUD
 
-        if tag == "a" and self.flags.get("tag"):
-            self.flags["tag"] = False
+        if tag == "a" and self.flags & F_TAG:
+            self.flags &= ~F_TAG
 
     def _handle_end_a_tag(self):
-        if self.flags["artist"] and self.current_artist.get("artist_name"):
-            self.current_album["artist"].append(self.current_artist.copy())
-        self.flags["artist"] = False
-
-        if self.flags["album_name"] and self.current_album_name.get("album_title"):
-            self.current_album["album"] = self.current_album_name.copy()
-        self.flags["album_name"] = False
-
-        if self.flags["genre_link"] and self.current_genre.get("genre_name"):
-            self.current_album["genre"].append(self.current_genre.copy())
-        self.flags["genre_link"] = False
-
-        if self.flags["label"] and self.current_label.get("label_name"):
-            self.current_album["label"] = self.current_label.copy()
-        self.flags["label"] = False
+        # Finished dicts are handed over to the album and replaced, not copied
+        if self.flags & F_ARTIST and self.current_artist.get("artist_name"):
+            self.current_album["artist"].append(self.current_artist)
+            self.current_artist = {}
+        self.flags &= ~F_ARTIST
+
+        if self.flags & F_ALBUM_NAME and self.current_album_name.get("album_title"):
+            self.current_album["album"] = self.current_album_name
+            self.current_album_name = {}
+        self.flags &= ~F_ALBUM_NAME
+
+        if self.flags & F_GENRE_LINK and self.current_genre.get("genre_name"):
+            self.current_album["genre"].append(self.current_genre)
+            self.current_genre = {}
+        self.flags &= ~F_GENRE_LINK
+
+        if self.flags & F_LABEL and self.current_label.get("label_name"):
+            self.current_album["label"] = self.current_label
+            self.current_label = {}
+        self.flags &= ~F_LABEL
 
     def handle_data(self, data: str):
-        if not self.flags["album"]:
+        if not self.flags & F_ALBUM:
             return
 
-        data = data.strip()
-        if not data:
+        # Most text nodes between tags are bare whitespace
+        if not data or data.isspace():
             return
+        data = data.strip()
 
-        handlers = {
-            "artist": lambda: self._append("current_artist", "artist_name", data),
-            "album_name": lambda: self._append(
-                "current_album_name", "album_title", data
-            ),
-            "label": lambda: self._append("current_label", "label_name", data),
-            "genre_link": lambda: self._append("current_genre", "genre_name", data),
-        }
+        f = self.flags
+        album = self.current_album
 
-        for flag, handler in handlers.items():
-            if self.flags[flag]:
-                handler()
+        # Genres, tags, labels, ratings and ownership repeat across the collection
+        if f & (F_GENRE_LINK | F_TAG | F_LABEL | F_RATING | F_OWNERSHIP):
+            data = sys.intern(data)
 
-        if self.flags["tag"]:
-            self.current_album["tag"].append(data)
+        for flag, obj_attr, key in self._LINK_TARGETS:
+            if f & flag:
+                self._append(obj_attr, key, data)
 
-        if self.flags["label_catalognr"]:
-            data = data.strip()
-            if not data or data.lower() == "n/a":
+        if f & F_TAG:
+            album["tag"].append(data)
+
+        if f & F_LABEL_CATALOGNR:
+            data = self._handle_label_catalognr(data)
+            if data is None:
                 return
-            if "label_catalognr" not in self.current_label and ":" in data:
-                data = data.rstrip("|").strip()
-                self.current_label["label_catalognr"] = data
 
-        if self.flags["date"]:
-            self.current_album["date"] = data.replace("(", "").replace(")", "")
+        if f & F_DATE:
+            album["date"] = data.replace("(", "").replace(")", "")
 
-        if self.flags["rating"]:
-            self.current_album["rating"] = data
+        if f & F_RATING:
+            album["rating"] = data
 
-        if self.flags["ownership"]:
-            self.current_album["ownership"] = data
+        if f & F_OWNERSHIP:
+            album["ownership"] = data
 
-        if self.flags["credited_name"]:
+        if f & F_CREDITED_NAME:
             self.collab_name.append(data)
 
+    def _handle_label_catalognr(self, data: str) -> str | None:
+        """Store the label's catalog number. Returns None for "n/a"."""
+        if data.lower() == "n/a":
+            return None
+        if "label_catalognr" not in self.current_label and ":" in data:
+            data = data.rstrip("|").strip()
+            self.current_label["label_catalognr"] = data
+        return data
+
     def _append(self, obj_attr: str, key: str, new_data: str):
         obj = getattr(self, obj_attr)
         existing = obj.get(key)
@@ -207,10 +223,14 @@ class Rymparser(HTMLParser):
         return new_data if original is None else f"{original} {new_data}"
 
     def _extract_id(self, title: str, include_brackets: bool = False):
-        match = re.search(r"\[(.*?)]", title)
-        if match:
-            return f"[{match.group(1)}]" if include_brackets else match.group(1)
-        return None
+        # RYM IDs never contain brackets, so the first [...] pair is the ID
+        start = title.find("[")
+        if start < 0:
+            return None
+        end = title.find("]", start + 1)
+        if end < 0:
+            return None
+        return title[start : end + 1] if include_brackets else title[start + 1 : end]
 
     def _finalize_current_album(self):
         if self.collab_name:
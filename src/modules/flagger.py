@@ -1,4 +1,5 @@
 import io
+import struct
 import subprocess
 from pathlib import Path
 from datetime import datetime
@@ -7,7 +8,13 @@ from mutagen.flac import FLAC
 from PIL import Image
 
 from core.base import BaseProcessor
-from constants.flagger import CORRUPTED, OK
+from constants.flagger import (
+    CORRUPTED,
+    OK,
+    JPEG_SOF_MARKERS,
+    JPEG_SOI,
+    PNG_SIGNATURE,
+)
 from utils.helpers import get_config
 
 
@@ -32,14 +39,15 @@ class Flagger(BaseProcessor):
         self.streamstamp = get_config(
             config, "streamstamp", expected_type=str, optional=True, default=None
         )
-        self.cover_target_size = tuple(
-            get_config(
-                config,
-                "cover_target_size",
-                expected_type=list[int, int],
-                optional=True,
-                default=None,
-            )
+        cover_target_size = get_config(
+            config,
+            "cover_target_size",
+            expected_type=list[int, int],
+            optional=True,
+            default=None,
+        )
+        self.cover_target_size = (
+            tuple(cover_target_size) if cover_target_size else None
         )
         self.cover_square = get_config(
             config, "cover_square", expected_type=bool, optional=True, default=False
@@ -51,7 +59,7 @@ class Flagger(BaseProcessor):
                 "cover_allowed_formats",
                 expected_type=list[str],
                 optional=True,
-                default=None,
+                default=[],
             )
         }
         self.skip_integrity_check = get_config(
@@ -61,12 +69,24 @@ class Flagger(BaseProcessor):
             optional=True,
             default=False,
         )
+        self.skip_cover_check = get_config(
+            config,
+            "skip_cover_check",
+            expected_type=bool,
+            optional=True,
+            default=False,
+        )
+
+        # Date written to the timestamp field
+        self.today = None
 
         # Additional stats
         self.stats.modified = {}
         self.stats.modified_already = []
 
     def pre_process(self):
+        # One check date for the whole run
+        self.today = datetime.now().strftime("%Y-%m-%d")
         self.logger.info("Flagging problematic files...")
 
     def process_file(self, file: Path):
@@ -76,33 +96,43 @@ class Flagger(BaseProcessor):
             audio = FLAC(file)
             self.check_integrity(file, audio)
             self.check_tags(file, audio)
-            self.check_cover(file, audio)
+            if not self.skip_cover_check:
+                self.check_cover(file, audio)
             self.document_problems(file, audio)
         except Exception:
             with self.lock:
                 self.stats.failed.append(file)
 
+    def _flag(self, file: Path, problem: str):
+        with self.lock:
+            self.stats.modified.setdefault(file, []).append(problem)
+
     def document_problems(self, file: Path, audio: FLAC):
         problems = self.stats.modified.get(file, [])
-        if self.streamstamp and CORRUPTED not in problems and not self.dry_run:
+        changed = False
+
+        if self.streamstamp and CORRUPTED not in problems:
             if audio.get(self.streamstamp, []) != [OK]:
                 audio[self.streamstamp] = OK
-                audio.save()
+                changed = True
+
         if problems:
-            if sorted(problems) == sorted(audio.get(self.problems_field, [])):
+            existing = frozenset(audio.get(self.problems_field, ()))
+            if frozenset(problems) == existing:
                 with self.lock:
                     self.stats.modified_already.append(file)
             else:
-                if not self.dry_run:
-                    audio[self.problems_field] = problems
-                    if self.timestamp:
-                        audio[self.timestamp] = datetime.now().strftime("%Y-%m-%d")
-                    audio.save()
-        else:
-            if not self.dry_run:
-                if audio.get(self.problems_field, []):
-                    audio[self.problems_field] = []
-                    audio.save()
+                audio[self.problems_field] = problems
+                if self.timestamp:
+                    audio[self.timestamp] = self.today
+                changed = True
+        elif audio.get(self.problems_field, []):
+            audio[self.problems_field] = []
+            changed = True
+
+        # Write all tag changes in a single metadata rewrite
+        if changed and not self.dry_run:
+            audio.save()
 
     def check_integrity(self, file: Path, audio: FLAC):
         if self.skip_integrity_check:
@@ -112,15 +142,15 @@ class Flagger(BaseProcessor):
             return
 
         try:
+            # Only the exit status is used, so silence and discard flac's progress output
             result = subprocess.run(
-                ["flac", "-t", str(file)],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
+                ["flac", "-t", "-s", str(file)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
                 check=False,
             )
             if result.returncode != 0:
-                self.stats.modified.setdefault(file, []).append(CORRUPTED)
+                self._flag(file, CORRUPTED)
         except FileNotFoundError:
             self.logger.critical(
                 "The 'flac' command is not found. Please install the FLAC utility."
@@ -131,54 +161,88 @@ class Flagger(BaseProcessor):
             return
         for tag in self.tags_to_check:
             if tag not in audio or not audio[tag]:
-                self.stats.modified.setdefault(file, []).append(f"NO {tag.upper()}")
+                self._flag(file, f"NO {tag.upper()}")
         return
 
     def check_cover(self, file: Path, audio: FLAC):
         pictures = audio.pictures
         if not pictures:
-            with self.lock:
-                self.stats.modified.setdefault(file, []).append("NO COVER")
+            self._flag(file, "NO COVER")
             return
         if len(pictures) > 1:
-            with self.lock:
-                self.stats.modified.setdefault(file, []).append("MULTIPLE COVERS")
+            self._flag(file, "MULTIPLE COVERS")
+
+        # Nothing to inspect beyond presence and count
+        if not self.cover_target_size and not self.cover_allowed_formats:
+            return
 
         pic = pictures[0]
         image_data = pic.data
         try:
-            with Image.open(io.BytesIO(image_data)) as image:
-                if (image.size[0] != self.cover_target_size[0]) or (
-                    image.size[1] != self.cover_target_size[1]
-                ):
-                    if self.cover_square:
-                        with self.lock:
-                            self.stats.modified.setdefault(file, []).append(
-                                "COVER NOT SQUARE"
-                            )
-                    if self.cover_target_size:
-                        if (
-                            image.size[0] < self.cover_target_size[0]
-                            and image.size[1] < self.cover_target_size[1]
-                        ):
-                            with self.lock:
-                                self.stats.modified.setdefault(file, []).append(
-                                    "COVER TOO SMALL"
-                                )
-                        if (
-                            image.size[0] > self.cover_target_size[0]
-                            and image.size[1] > self.cover_target_size[1]
-                        ):
-                            with self.lock:
-                                self.stats.modified.setdefault(file, []).append(
-                                    "COVER TOO LARGE"
-                                )
-                if image.format.lower() not in self.cover_allowed_formats:
-                    with self.lock:
-                        self.stats.modified.setdefault(file, []).append(
-                            "COVER WRONG FORMAT"
-                        )
+            header = image_header(image_data)
+            if header is None:
+                # Unknown or unusual layout, let Pillow identify it
+                with Image.open(io.BytesIO(image_data)) as image:
+                    header = (*image.size, image.format.lower())
+            width, height, image_format = header
+
+            if self.cover_target_size and (width, height) != self.cover_target_size:
+                target_width, target_height = self.cover_target_size
+                if self.cover_square:
+                    self._flag(file, "COVER NOT SQUARE")
+                if width < target_width and height < target_height:
+                    self._flag(file, "COVER TOO SMALL")
+                if width > target_width and height > target_height:
+                    self._flag(file, "COVER TOO LARGE")
+            if (
+                self.cover_allowed_formats
+                and image_format not in self.cover_allowed_formats
+            ):
+                self._flag(file, "COVER WRONG FORMAT")
         except Exception:
-            with self.lock:
-                self.stats.modified.setdefault(file, []).append("COVER ACCESS ERROR")
+            self._flag(file, "COVER ACCESS ERROR")
         return
+
+
+def image_header(data: bytes) -> tuple[int, int, str] | None:
+    """
+    Read (width, height, format) of a JPEG or PNG straight from its header.
+    Returns None for other formats or headers that can't be parsed.
+    """
+    if data[:8] == PNG_SIGNATURE:
+        return _png_header(data)
+    if data[:2] == JPEG_SOI:
+        return _jpeg_header(data)
+    return None
+
+
+def _png_header(data: bytes) -> tuple[int, int, str] | None:
+    if data[12:16] != b"IHDR":
+        return None
+    width, height = struct.unpack(">II", data[16:24])
+    return width, height, "png"
+
+
+def _jpeg_header(data: bytes) -> tuple[int, int, str] | None:
+    i = 2
+    size = len(data)
+    while i + 4 <= size:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        # Fill bytes
+        if marker == 0xFF:
+            i += 1
+            continue
+        # Standalone markers without a length field
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            if i + 9 > size:
+                return None
+            height, width = struct.unpack(">HH", data[i + 5 : i + 9])
+            return width, height, "jpeg"
+        (length,) = struct.unpack(">H", data[i + 2 : i + 4])
+        i += 2 + length
+    return None
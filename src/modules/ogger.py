@@ -1,13 +1,25 @@
 import hashlib
+import os
 import subprocess
+from collections import defaultdict
+from operator import itemgetter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 from mutagen.flac import FLAC
 from mutagen.oggvorbis import OggVorbis
 
 from core.base import BaseProcessor
-from constants.ogger import BITRATE_QUALITY_MAP
-from utils.helpers import get_config, index_files, parallel_map, check_stop
+from constants.globals import DATA_DIR
+from constants.ogger import BITRATE_QUALITY_MAP, FINGERPRINT_VERSION
+from utils.helpers import (
+    get_config,
+    index_files,
+    parallel_map,
+    check_stop,
+    load_cache,
+    save_cache,
+)
 
 
 class Ogger(BaseProcessor):
@@ -21,6 +33,7 @@ class Ogger(BaseProcessor):
         self.quality = get_config(
             config, "quality", expected_type=int, optional=True, default=2
         )
+        self.expected_bitrate = BITRATE_QUALITY_MAP[self.quality]
         self.sample_rate = get_config(
             config, "sample_rate", expected_type=int, optional=True, default=44100
         )
@@ -35,6 +48,9 @@ class Ogger(BaseProcessor):
         self.filename_match = get_config(
             config, "filename_match", expected_type=bool, optional=True, default=True
         )
+        self.always_index = get_config(
+            config, "always_index", expected_type=bool, optional=True, default=False
+        )
         self.cover_target_size = tuple(
             get_config(
                 config,
@@ -55,10 +71,21 @@ class Ogger(BaseProcessor):
             )
         }
 
+        # Fingerprints of unchanged OGG files are reused across runs. The cache
+        # lives in the data directory (one per OGG directory), not in the library.
+        ogg_dir_key = hashlib.blake2b(
+            str(self.ogg_dir.resolve()).encode(), digest_size=8
+        ).hexdigest()
+        self.cache_path = DATA_DIR / f"ogger_cache_{ogg_dir_key}.db"
+
         # Initialise indices
         self.flac_metadata_index = {}
         self.ogg_files = []
         self.ogg_metadata_index = {}
+        self.ogg_by_fingerprint = defaultdict(list)
+        self.ogg_by_track_id = defaultdict(list)
+        self.ogg_by_relative_stem = {}
+        self.filename_matches = {}
 
         # Stats
         self.stats.ogg_files_unmatched = set()
@@ -79,17 +106,78 @@ class Ogger(BaseProcessor):
         # Initialise set for unmatched ogg files
         self.stats.ogg_files_unmatched = set(self.ogg_files)
 
-        # Build OGG metadata index
+        # Index OGG files by relative path without suffix for filename matching
+        self.ogg_by_relative_stem = {
+            file.relative_to(self.ogg_dir).with_suffix(""): file
+            for file in self.ogg_files
+        }
+
+        # Pair files by filename first so only the rest need fingerprinting. This
+        # makes a same-named OGG win over a track ID or fingerprint match;
+        # always_index restores the track ID -> fingerprint -> filename order.
+        if self.filename_match and not self.always_index:
+            for file in self.files:
+                ogg_file = self.ogg_by_relative_stem.get(
+                    file.relative_to(self.main_dir).with_suffix("")
+                )
+                if ogg_file and self._confirm_match(ogg_file):
+                    self.filename_matches[file] = ogg_file
+            self.logger.info(
+                "Matched %d files by filename.", len(self.filename_matches)
+            )
+        files_to_fingerprint = [
+            file
+            for file in self.ogg_files
+            if file not in self.stats.ogg_files_matched
+        ]
+
+        # Reuse fingerprints of OGG files unchanged since the last run
+        cache = self._load_fingerprint_cache()
+        results = []
+        stat_keys = {}
+        files_to_parse = []
+        for file in files_to_fingerprint:
+            try:
+                st = file.stat()
+            except OSError:
+                results.append(None)
+                files_to_parse.append(file)
+                continue
+            stat_keys[file] = (st.st_mtime_ns, st.st_size)
+            cached = cache.get(str(file))
+            if cached and cached[:2] == stat_keys[file]:
+                results.append(cached[2:])
+            else:
+                results.append(None)
+                files_to_parse.append(file)
+        self.logger.info(
+            "Reused %d cached fingerprints.",
+            len(files_to_fingerprint) - len(files_to_parse),
+        )
+
+        # Build OGG metadata index (parsing runs in worker processes)
         self.logger.info("Generating metadata fingerprints for OGG files...")
-        parallel_map(
-            func=self._build_ogg_metadata_index,
-            items_with_args=self.ogg_files,
+        parsed = parallel_map(
+            func=read_ogg_fingerprint,
+            items_with_args=[
+                (file, self.track_id_field, self.fields_to_preserve)
+                for file in files_to_parse
+            ],
+            executor_type=ProcessPoolExecutor,
             max_workers=self.max_workers,
             stop_flag=self.stop_flag,
             logger=self.logger,
             description="Fingerprinting",
             unit="files",
         )
+        parsed = dict(zip(files_to_parse, parsed))
+        results = [
+            parsed[file] if result is None else result
+            for file, result in zip(files_to_fingerprint, results)
+        ]
+        self._build_ogg_metadata_index(files_to_fingerprint, results)
+        if not self.dry_run:
+            self._save_fingerprint_cache(stat_keys)
 
     def pre_process(self):
         self.logger.info("Syncing collections...")
@@ -97,60 +185,127 @@ class Ogger(BaseProcessor):
     def process_file(self, file: Path):
         with self.lock:
             self.stats.flac_files_processed.append(file)
-        match = self._match_files(file)
+
+        # Where this FLAC's OGG should live, computed once per file
+        relative_path = file.relative_to(self.main_dir)
+        ogg_output = self.ogg_dir / relative_path.with_suffix(".ogg")
+
+        # Parse the FLAC once for matching, syncing and converting
+        flac_audio = FLAC(file)
+
+        match = self._match_files(file, flac_audio, relative_path.with_suffix(""))
         if not match:
-            self._convert_file(file)
-        else:
-            if not self._verify_stream(match):
-                self._convert_file(file)
-            else:
-                self._sync_metadata(file, match)
+            self._convert_file(file, flac_audio, ogg_output)
+            return
 
-    def _build_ogg_metadata_index(self, file: Path) -> dict:
+        # Parse the matched OGG once for both verification and syncing
         try:
-            track_id = None
-            tags = dict(OggVorbis(file).items())
-
-            # Get track_id field (assuming it's a valid metadata field)
-            track_id = None
-            for key, value in tags.items():
-                if key.upper() == self.track_id_field:
-                    track_id = value[0]
-                    break
-            # Create a hashable "fingerprint" from the metadata
-            fingerprint = self._generate_fingerprint(tags)
-            # Add both the fingerprint and track_id to the index
-            with self.lock:
-                self.ogg_metadata_index[file] = (fingerprint, track_id)
+            ogg_audio = OggVorbis(match)
+        except Exception as e:
+            self.logger.error("Error reading %s: %s", match, e)
+            ogg_audio = None
 
-        except Exception:
+        if ogg_audio is None or not self._verify_stream(ogg_audio):
+            self._convert_file(file, flac_audio, ogg_output)
+        else:
+            self._sync_metadata(file, flac_audio, match, ogg_output, ogg_audio)
+
+    def _build_ogg_metadata_index(self, files: list[Path], results: list):
+        """Index fingerprinting results and remove OGG files that couldn't be read."""
+        corrupt = []
+        for file, result in zip(files, results):
+            # Not processed (stopped early or worker error)
+            if result is None:
+                continue
+            fingerprint, track_id = result
+            if fingerprint is None:
+                corrupt.append(file)
+                continue
+            self.ogg_metadata_index[file] = (fingerprint, track_id)
+            self.ogg_by_fingerprint[fingerprint].append(file)
+            if track_id:
+                self.ogg_by_track_id[track_id].append(file)
+
+        for file in corrupt:
             if not self.dry_run:
                 try:
                     file.unlink()
                 except Exception as delete_error:
                     self.logger.error(
-                        f"Failed to delete corrupt file {file}: {delete_error}"
+                        "Failed to delete corrupt file %s: %s", file, delete_error
                     )
-            with self.lock:
-                self.ogg_files.remove(file)
 
-    def _generate_fingerprint(self, tags: dict) -> str:
-        # Filter tags to only include those explicitly set in fields_to_preserve
-        filtered_tags = {
-            k: v for k, v in tags.items() if k.upper() in self.fields_to_preserve
+        # Filter once instead of list.remove() per corrupt file
+        if corrupt:
+            corrupt = set(corrupt)
+            self.ogg_files = [file for file in self.ogg_files if file not in corrupt]
+            self.stats.ogg_files_unmatched -= corrupt
+            self.ogg_by_relative_stem = {
+                stem: file
+                for stem, file in self.ogg_by_relative_stem.items()
+                if file not in corrupt
+            }
+
+    def _cache_settings(self) -> str:
+        """Fingerprint inputs; cached entries are only valid for the same settings."""
+        return repr(
+            (
+                FINGERPRINT_VERSION,
+                self.track_id_field,
+                sorted(self.fields_to_preserve),
+            )
+        )
+
+    def _load_fingerprint_cache(self) -> dict:
+        """
+        Read cached OGG fingerprints as {path: (mtime_ns, size, fingerprint, track_id)}.
+        Returns an empty dict if the cache is missing, unreadable or stale.
+        """
+        cache = load_cache(
+            self.cache_path,
+            "cache",
+            ["path", "mtime_ns", "size", "fingerprint", "track_id"],
+            logger=self.logger,
+            settings=self._cache_settings(),
+        )
+        return {
+            path: (mtime_ns, size, int.from_bytes(fingerprint, "little"), track_id)
+            for path, (mtime_ns, size, fingerprint, track_id) in cache.items()
         }
 
-        # Sort keys case-insensitively (but keep original casing)
-        metadata_str = "".join(
-            f"{k}:{';'.join(v)}"
-            for k, v in sorted(filtered_tags.items(), key=lambda item: item[0].upper())
+    def _save_fingerprint_cache(self, stat_keys: dict):
+        """Replace the cache with the fingerprints indexed in this run."""
+        rows = [
+            (
+                str(file),
+                *stat_keys[file],
+                fingerprint.to_bytes(8, "little"),
+                track_id,
+            )
+            for file, (fingerprint, track_id) in self.ogg_metadata_index.items()
+            if file in stat_keys
+        ]
+        save_cache(
+            self.cache_path,
+            "cache",
+            {
+                "path": "TEXT",
+                "mtime_ns": "INTEGER",
+                "size": "INTEGER",
+                "fingerprint": "BLOB",
+                "track_id": "TEXT",
+            },
+            rows,
+            logger=self.logger,
+            settings=self._cache_settings(),
         )
 
-        # Return a hash of the metadata string (MD5 hash)
-        return hashlib.md5(metadata_str.encode("utf-8")).hexdigest()
+    def _generate_fingerprint(self, tags: dict) -> int:
+        return generate_fingerprint(tags, self.fields_to_preserve)
 
-    def _match_files(self, flac_file: Path) -> Path | None:
-        flac_audio = FLAC(flac_file)
+    def _match_files(
+        self, flac_file: Path, flac_audio: FLAC, flac_rel: Path
+    ) -> Path | None:
         flac_id = None
         for key, value in flac_audio.items():
             if key.upper() == self.track_id_field:
@@ -159,42 +314,68 @@ class Ogger(BaseProcessor):
         flac_fingerprint = self._generate_fingerprint(flac_audio)
         self.flac_metadata_index[flac_file] = (flac_fingerprint, flac_id)
 
-        # Try matching by track ID and/or fingerprint
-        for ogg_file, (ogg_fingerprint, ogg_id) in self.ogg_metadata_index.items():
-            if ogg_file not in self.stats.ogg_files_unmatched:
-                continue
-
-            if self.track_id_field and flac_id and ogg_id and flac_id == ogg_id:
-                return self._confirm_match(ogg_file)
+        # Already paired by filename before fingerprinting
+        ogg_file = self.filename_matches.get(flac_file)
+        if ogg_file:
+            return ogg_file
 
-            if flac_fingerprint == ogg_fingerprint:
-                return self._confirm_match(ogg_file)
+        # Try matching by track ID, then by fingerprint (indices hold unclaimed files)
+        candidates = []
+        if self.track_id_field and flac_id:
+            candidates.extend(self.ogg_by_track_id.get(flac_id, ()))
+        candidates.extend(self.ogg_by_fingerprint.get(flac_fingerprint, ()))
+        for ogg_file in candidates:
+            if self._confirm_match(ogg_file):
+                return ogg_file
 
         # Fallback: try matching by filename if enabled
         if self.filename_match:
-            flac_rel = flac_file.relative_to(self.main_dir).with_suffix("")
-            for ogg_file in list(self.stats.ogg_files_unmatched):
-                ogg_rel = ogg_file.relative_to(self.ogg_dir).with_suffix("")
-                if flac_rel == ogg_rel:
-                    return self._confirm_match(ogg_file)
+            ogg_file = self.ogg_by_relative_stem.get(flac_rel)
+            if ogg_file and self._confirm_match(ogg_file):
+                return ogg_file
 
         return None
 
-    def _confirm_match(self, ogg_file: Path) -> Path:
+    def _confirm_match(self, ogg_file: Path) -> bool:
+        """Claim an unmatched OGG file. Returns False if another FLAC already has it."""
         with self.lock:
+            if ogg_file not in self.stats.ogg_files_unmatched:
+                return False
             self.stats.ogg_files_unmatched.remove(ogg_file)
-        with self.lock:
             self.stats.ogg_files_matched.add(ogg_file)
-        return ogg_file
-
-    def _sync_metadata(self, flac_file: Path, ogg_file: Path):
-        # Load FLAC and OGG metadata
-        flac_audio = FLAC(flac_file)
-        ogg_audio = OggVorbis(ogg_file)
 
+            # Keep only unclaimed files in the lookup indices
+            fingerprint, track_id = self.ogg_metadata_index.get(
+                ogg_file, (None, None)
+            )
+            for index, key in (
+                (self.ogg_by_fingerprint, fingerprint),
+                (self.ogg_by_track_id, track_id),
+            ):
+                candidates = index.get(key)
+                if candidates:
+                    candidates.remove(ogg_file)
+                    if not candidates:
+                        del index[key]
+        return True
+
+    def _sync_metadata(
+        self,
+        flac_file: Path,
+        flac_audio: FLAC,
+        ogg_file: Path,
+        ogg_output: Path,
+        ogg_audio: OggVorbis,
+    ):
         # Check if relevant metadata differs
         flac_metadata_fingerprint = self.flac_metadata_index[flac_file][0]
-        ogg_metadata_fingerprint = self.ogg_metadata_index[ogg_file][0]
+        if ogg_file in self.ogg_metadata_index:
+            ogg_metadata_fingerprint = self.ogg_metadata_index[ogg_file][0]
+        else:
+            # Paired by filename, so it wasn't fingerprinted up front
+            ogg_metadata_fingerprint = self._generate_fingerprint(
+                dict(ogg_audio.items())
+            )
 
         if flac_metadata_fingerprint != ogg_metadata_fingerprint:
             # Clear all fields before copying new metadata
@@ -213,27 +394,18 @@ class Ogger(BaseProcessor):
                 self.stats.ogg_files_modified.append(ogg_file)
 
         # Check if filenames (relative paths) mismatch
-        expected_ogg_relative_path = flac_file.relative_to(self.main_dir).with_suffix(
-            ".ogg"
-        )
-        actual_ogg_relative_path = ogg_file.relative_to(self.ogg_dir)
-
-        if expected_ogg_relative_path != actual_ogg_relative_path:
-
-            target_path = self.ogg_dir / expected_ogg_relative_path
-
+        if ogg_file != ogg_output:
             if not self.dry_run:
-                target_path.parent.mkdir(parents=True, exist_ok=True)
-                ogg_file.rename(target_path)
+                ogg_output.parent.mkdir(parents=True, exist_ok=True)
+                ogg_file.rename(ogg_output)
 
             with self.lock:
-                self.stats.ogg_files_renamed.append(target_path)
+                self.stats.ogg_files_renamed.append(ogg_output)
 
-    def _verify_stream(self, ogg_file: Path) -> bool:
+    def _verify_stream(self, ogg_audio: OggVorbis) -> bool:
         verified = True
         try:
-            ogg_audio = OggVorbis(ogg_file)
-            if ogg_audio.info.bitrate != BITRATE_QUALITY_MAP[self.quality]:
+            if ogg_audio.info.bitrate != self.expected_bitrate:
                 verified = False
             if ogg_audio.info.sample_rate != self.sample_rate:
                 verified = False
@@ -241,17 +413,15 @@ class Ogger(BaseProcessor):
                 verified = False
             return verified
         except Exception as e:
-            self.logger.error(f"Error verifying bitrate: {e}")
+            self.logger.error("Error verifying bitrate: %s", e)
             return False
 
-    def _convert_file(self, flac_file: Path):
-        ogg_file = self.ogg_dir / flac_file.relative_to(self.main_dir).with_suffix(
-            ".ogg"
-        )
+    def _convert_file(self, flac_file: Path, flac_audio: FLAC, ogg_file: Path):
         if not self.dry_run:
             ogg_file.parent.mkdir(parents=True, exist_ok=True)
             command = [
                 "ffmpeg",
+                "-nostdin",
                 "-y",
                 "-loglevel",
                 "error",
@@ -275,7 +445,6 @@ class Ogger(BaseProcessor):
                 subprocess.run(command, check=True)
 
                 try:
-                    flac_audio = FLAC(flac_file)
                     ogg_audio = OggVorbis(ogg_file)
 
                     # Clear any existing metadata
@@ -291,13 +460,14 @@ class Ogger(BaseProcessor):
 
                 except Exception as meta_error:
                     self.logger.error(
-                        f"Failed to write metadata for {ogg_file}: {meta_error}"
+                        "Failed to write metadata for %s: %s", ogg_file, meta_error
                     )
 
             except subprocess.CalledProcessError as e:
-                self.logger.error(f"ffmpeg failed for {flac_file}: {e}")
+                self.logger.error("ffmpeg failed for %s: %s", flac_file, e)
 
-        self.stats.ogg_files_converted.append(ogg_file)
+        with self.lock:
+            self.stats.ogg_files_converted.append(ogg_file)
 
     def _clean(self):
         self.logger.info("Cleaning up unmatched OGG files and empty directories...")
@@ -308,11 +478,62 @@ class Ogger(BaseProcessor):
                 ogg_file.unlink()
             self.stats.ogg_files_deleted.append(ogg_file)
 
-        # Traverse the directory tree bottom-up
-        for dir_path in sorted(self.ogg_dir.rglob("*"), key=lambda p: -len(p.parts)):
+        # Traverse the directory tree bottom-up, children before parents
+        removed = set()
+        for root, dirs, files in os.walk(self.ogg_dir, topdown=False):
             if check_stop(self.stop_flag, self.logger):
                 break
-            if dir_path.is_dir() and not any(dir_path.iterdir()):
+            if root == str(self.ogg_dir) or files:
+                continue
+            # Listings are taken before children are removed, so account for those
+            if all(os.path.join(root, name) in removed for name in dirs):
                 if not self.dry_run:
-                    self.stats.directories_deleted.append(dir_path)
-                    dir_path.rmdir()
+                    self.stats.directories_deleted.append(Path(root))
+                    os.rmdir(root)
+                    removed.add(root)
+
+
+def read_ogg_fingerprint(
+    file: Path, track_id_field: str | None, fields_to_preserve: set[str]
+) -> tuple[int | None, str | None]:
+    """
+    Read an OGG file's (fingerprint, track_id). Runs in a worker process.
+    Returns (None, None) if the file can't be read.
+    """
+    try:
+        tags = dict(OggVorbis(file).items())
+    except Exception:
+        return None, None
+
+    # Get track_id field (assuming it's a valid metadata field)
+    track_id = None
+    for key, value in tags.items():
+        if key.upper() == track_id_field:
+            track_id = value[0]
+            break
+
+    return generate_fingerprint(tags, fields_to_preserve), track_id
+
+
+def generate_fingerprint(tags: dict, fields_to_preserve: set[str]) -> int:
+    """
+    Hash the preserved tags into a 64-bit fingerprint.
+    Tags are fed to the hash one by one, sorted case-insensitively by key.
+    Each "key:values" segment ends with a null byte so segment boundaries stay unambiguous.
+    """
+    # Upper-case each key once and only sort the preserved tags
+    preserved = []
+    for k, v in tags.items():
+        upper = k.upper()
+        if upper in fields_to_preserve:
+            preserved.append((upper, k, v))
+    preserved.sort(key=itemgetter(0))
+
+    fingerprint = hashlib.blake2b(digest_size=8)
+    for _, k, v in preserved:
+        fingerprint.update(k.encode("utf-8"))
+        fingerprint.update(b":")
+        fingerprint.update(";".join(v).encode("utf-8"))
+        fingerprint.update(b"\x00")
+
+    return int.from_bytes(fingerprint.digest(), "little")
@@ -1,9 +1,11 @@
+import hashlib
+from functools import lru_cache
 from pathlib import Path
 
 from mutagen.flac import FLAC
 
 from core.base import BaseProcessor
-from utils.helpers import get_config, UpperFLAC
+from utils.helpers import get_config, load_cache, save_cache, UpperFLAC
 from constants.globals import DATA_DIR
 from modules._rymparser import Rymparser
 
@@ -25,21 +27,50 @@ class Rymporter(BaseProcessor):
             config, "collection", expected_type=str, optional=False
         )
 
+        # Upper-case field names of the tags to modify, resolved once
+        self.field_names = {
+            tag: self.field_definitions[tag].upper()
+            for tag, enabled in self.fields_to_modify.items()
+            if enabled and self.field_definitions.get(tag)
+        }
+
+        # Files already in sync with their album are skipped on later runs. One
+        # cache per main directory, keyed by resolved file path.
+        main_dir_key = hashlib.blake2b(
+            str(self.main_dir.resolve()).encode(), digest_size=8
+        ).hexdigest()
+        self.cache_path = DATA_DIR / f"rymporter_cache_{main_dir_key}.db"
+        self.cache_keys = {}
+        self.file_cache = {}
+        self.synced_files = {}
+        self.album_digests = {}
+
         # Additional stats
-        self.stats.albums_skipped = []
+        self.stats.albums_skipped = set()
         self.stats.files_insufficient_metadata = []
+        self.stats.files_unchanged = []
 
-        # Initialise index
+        # Initialise indices
         self.rym_albums = []
+        self.albums_by_id = {}
+        self.albums_by_artist_title = {}
 
     def post_index(self):
         """Uses Rymparser to parse RYM collection."""
         parser = Rymparser()
         self.logger.info(f"Parsing collection in {self.collection}...")
         try:
+            # Feed the file in chunks, cut before a tag so text nodes arrive whole
+            pending = ""
             with self.collection.open("r", encoding="utf-8") as file:
-                collection_html = file.read()
-            parser.feed(collection_html)
+                while chunk := file.read(65536):
+                    pending += chunk
+                    cut = pending.rfind("<")
+                    if cut > 0:
+                        parser.feed(pending[:cut])
+                        pending = pending[cut:]
+            parser.feed(pending)
+            parser.close()
 
             # TODO: fix this hacky way to skip the first album
             albums = parser.albums[1:]
@@ -49,6 +80,9 @@ class Rymporter(BaseProcessor):
             else:
                 self.logger.info(f"Parsed {len(albums)} albums from the collection.")
                 self.rym_albums = albums
+                self._build_album_indices()
+                self.file_cache = self._load_file_cache()
+                self.cache_keys = {file: str(file.resolve()) for file in self.files}
 
         except FileNotFoundError:
             self.logger.error(f"Collection HTML file {self.collection} not found.")
@@ -59,7 +93,12 @@ class Rymporter(BaseProcessor):
         self.logger.info("Rymporting...")
 
     def process_file(self, file: Path):
-        matched = False
+        with self.lock:
+            self.stats.processed.append(file)
+
+        if self._is_unchanged(file):
+            return
+
         try:
             audio = UpperFLAC(FLAC(file))
             audio_artist = audio.get(self.field_definitions["artist_name"], [""])[0]
@@ -78,94 +117,214 @@ class Rymporter(BaseProcessor):
             if (audio_artist, audio_album_title) in self.stats.albums_skipped:
                 return
 
-            # Loop through all RYM albums
-            for i, rym_album in enumerate(self.rym_albums):
-                rym_album_id = rym_album["album"]["album_id"]
-                rym_album_title = rym_album["album"]["album_title"]
-                rym_artist = rym_album["artist"][0]["artist_name"]
-
-                # Match by ID
-                if rym_album_id == audio_album_id:
-                    matched = True
-                    self._update_album(rym_album, audio, file)
-                    break
-
-                # Match by normalised artist and album title
-                if rym_artist == audio_artist and rym_album_title == audio_album_title:
-                    matched = True
-                    self._update_album(rym_album, audio, file)
-                    break
-
-                # No match found after last album in list
-                if i == len(self.rym_albums) - 1 and not matched:
-                    with self.lock:
-                        self.stats.albums_skipped.append(
-                            (audio_artist, audio_album_title)
-                        )
-                    continue
+            # Match by ID, then by artist and album title
+            album_key = audio_album_id
+            rym_album = self.albums_by_id.get(album_key)
+            if rym_album is None:
+                name_key = (
+                    normalize_str(audio_artist),
+                    normalize_str(audio_album_title),
+                )
+                album_key = "\x00".join(name_key)
+                rym_album = self.albums_by_artist_title.get(name_key)
+
+            if rym_album:
+                if self._update_album(rym_album, audio, file):
+                    self._record_synced(file, album_key, rym_album)
+            elif self.rym_albums:
+                with self.lock:
+                    self.stats.albums_skipped.add((audio_artist, audio_album_title))
 
         except Exception as e:
             with self.lock:
                 self.stats.failed.append(file)
             self.logger.error(f"Error processing {file}: {type(e).__name__}: {e}")
 
-    def _update_album(self, rym_album: dict, audio: FLAC, file: Path):
+    def _build_album_indices(self):
+        """Index RYM albums by ID and by normalised (artist, title); first one wins."""
+        self.albums_by_id = {}
+        self.albums_by_artist_title = {}
+        for rym_album in self.rym_albums:
+            rym_album_id = rym_album["album"]["album_id"]
+            rym_album_title = rym_album["album"]["album_title"]
+            rym_artist = rym_album["artist"][0]["artist_name"]
+
+            if rym_album_id:
+                self.albums_by_id.setdefault(rym_album_id, rym_album)
+            # Normalised once per album rather than per file
+            key = (normalize_str(rym_artist), normalize_str(rym_album_title))
+            if all(key):
+                self.albums_by_artist_title.setdefault(key, rym_album)
+
+    def post_process(self):
+        self._save_file_cache()
+
+    def _album_for_key(self, album_key: str) -> dict | None:
+        """Find an album by the key it was matched with (ID, or artist and title)."""
+        if "\x00" in album_key:
+            return self.albums_by_artist_title.get(tuple(album_key.split("\x00", 1)))
+        return self.albums_by_id.get(album_key)
+
+    def _album_digest(self, album_key: str, rym_album: dict) -> str:
+        """Hash of the metadata an album writes, computed once per album."""
+        digest = self.album_digests.get(album_key)
+        if digest is None:
+            new_metadata = self._build_new_metadata_dict(rym_album)
+            digest = hashlib.blake2b(
+                repr(sorted(new_metadata.items())).encode("utf-8"), digest_size=16
+            ).hexdigest()
+            self.album_digests[album_key] = digest
+        return digest
+
+    def _is_unchanged(self, file: Path) -> bool:
+        """
+        Check if a file is unchanged since it was last in sync with its album,
+        and the album's metadata is unchanged too.
+        """
+        if not self.file_cache:
+            return False
+        cached = self.file_cache.get(self.cache_keys[file])
+        if not cached:
+            return False
+        mtime_ns, size, album_key, digest = cached
+        try:
+            st = file.stat()
+        except OSError:
+            return False
+        if (st.st_mtime_ns, st.st_size) != (mtime_ns, size):
+            return False
+        rym_album = self._album_for_key(album_key)
+        if not rym_album or self._album_digest(album_key, rym_album) != digest:
+            return False
+
+        with self.lock:
+            self.stats.files_unchanged.append(file)
+            self.synced_files[self.cache_keys[file]] = cached
+        return True
+
+    def _record_synced(self, file: Path, album_key: str, rym_album: dict):
+        """Remember a file that is now in sync with its album."""
+        try:
+            st = file.stat()
+        except OSError:
+            return
+        row = (
+            st.st_mtime_ns,
+            st.st_size,
+            album_key,
+            self._album_digest(album_key, rym_album),
+        )
+        with self.lock:
+            self.synced_files[self.cache_keys[file]] = row
+
+    def _load_file_cache(self) -> dict:
+        """
+        Read cached files as {path: (mtime_ns, size, album_key, digest)}.
+        Returns an empty dict if the cache is missing or unreadable.
+        """
+        return load_cache(
+            self.cache_path,
+            "files",
+            ["path", "mtime_ns", "size", "album_key", "digest"],
+            logger=self.logger,
+        )
+
+    def _save_file_cache(self):
+        """
+        Write the cache in a single transaction. Files processed in this run keep
+        an entry only if they ended up in sync; unprocessed files keep their old entry.
+        """
+        if not self.rym_albums:
+            return
+        processed = {self.cache_keys[file] for file in self.stats.processed}
+        current = set(self.cache_keys.values())
+        rows = {
+            path: row
+            for path, row in self.file_cache.items()
+            if path in current and path not in processed
+        }
+        rows.update(self.synced_files)
+        save_cache(
+            self.cache_path,
+            "files",
+            {
+                "path": "TEXT",
+                "mtime_ns": "INTEGER",
+                "size": "INTEGER",
+                "album_key": "TEXT",
+                "digest": "TEXT",
+            },
+            [(path, *row) for path, row in rows.items()],
+            logger=self.logger,
+        )
+
+    def _update_album(self, rym_album: dict, audio: FLAC, file: Path) -> bool:
+        """Write the album's metadata to a file. Returns True if the file is in sync."""
         new_metadata = self._build_new_metadata_dict(rym_album)
 
         modified = False
         for field_name, new_values in new_metadata.items():
-            # Use uppercase field names consistently
-            current_values = audio.get(field_name.upper(), [])
+            # Field names are already upper-case (see self.field_names)
+            current_values = audio.get(field_name, [])
             if self._should_update_field(current_values, new_values):
-                audio[field_name.upper()] = new_values
+                audio[field_name] = new_values
                 modified = True
-                with self.lock:
-                    self.stats.modified.append(file)
 
-        if modified:
-            if not self.dry_run:
-                try:
-                    audio.save()
-                except Exception as e:
-                    with self.lock:
-                        self.stats.failed.append(file)
-                    self.logger.error(f"Error saving file: {e}")
+        if not modified:
+            return True
+
+        with self.lock:
+            self.stats.modified.append(file)
+        if self.dry_run:
+            return False
+        try:
+            audio.save()
+            return True
+        except Exception as e:
+            with self.lock:
+                self.stats.failed.append(file)
+            self.logger.error(f"Error saving file: {e}")
+            return False
 
     def _build_new_metadata_dict(self, rym_album: dict) -> dict:
-        temp_values = {
-            self.field_definitions[tag].upper(): []
-            for tag in self.fields_to_modify
-            if self.fields_to_modify.get(tag) and self.field_definitions.get(tag)
-        }
+        temp_values = {field_name: [] for field_name in self.field_names.values()}
 
+        # Append straight into temp_values, no intermediate (tag, value) list
+        field_names = self.field_names
         for tag, value in rym_album.items():
-            tag_value_pairs = []
-
             if isinstance(value, list):
                 for item in value:
                     if isinstance(item, dict):
-                        tag_value_pairs.extend(
-                            (k, v) for k, v in item.items() if v not in (None, "")
-                        )
-                    elif isinstance(item, str):
-                        tag_value_pairs.append((tag, item))
+                        self._add_nested_values(temp_values, item)
+                    elif isinstance(item, str) and tag in field_names:
+                        temp_values[field_names[tag]].append(item)
             elif isinstance(value, dict):
-                tag_value_pairs.extend(
-                    (k, v) for k, v in value.items() if v not in (None, "")
-                )
+                self._add_nested_values(temp_values, value)
             else:
-                if value not in (None, ""):
-                    tag_value_pairs.append((tag, value))
-
-            for key, val in tag_value_pairs:
-                if self.fields_to_modify.get(key):
-                    field_name = self.field_definitions.get(key)
-                    if field_name:
-                        temp_values[field_name.upper()].append(val)
+                field_name = field_names.get(tag)
+                if field_name and value not in (None, ""):
+                    temp_values[field_name].append(value)
 
         return temp_values
 
+    def _add_nested_values(self, temp_values: dict, values: dict):
+        """Append the non-empty values of a nested dict (e.g. an artist)."""
+        for k, v in values.items():
+            field_name = self.field_names.get(k)
+            if field_name and v not in (None, ""):
+                temp_values[field_name].append(v)
+
     def _should_update_field(self, current_values: list, new_values: list) -> bool:
-        current_values_str = [str(v) for v in current_values]
-        new_values_str = [str(v) for v in new_values]
-        return current_values_str != new_values_str
+        # Stop at the first difference instead of building both string lists
+        if len(current_values) != len(new_values):
+            return True
+        for current, new in zip(current_values, new_values):
+            if current != new and str(current) != str(new):
+                return True
+        return False
+
+
+@lru_cache(maxsize=None)
+def normalize_str(value: str | None) -> str:
+    """Normalise a string for matching (case and surrounding whitespace are ignored)."""
+    return (value or "").strip().lower()
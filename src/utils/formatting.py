@@ -4,19 +4,16 @@ def summary_message(
     dry_run: bool,
 ) -> str:
     # Initialise with banner
-    message = banner_message(f"{dry_run_message(dry_run, name)} summary")
+    parts = [banner_message(f"{dry_run_message(dry_run, name)} summary")]
     # Table to summarise
     for description, items in summary_items.items():
         if isinstance(items, (list, set, tuple, dict)):
-            message += (
-                "\n" + description.replace("_", " ").capitalize() + f": {len(items)}"
-            )
+            parts.append(f"{description.replace('_', ' ').capitalize()}: {len(items)}")
         elif description == "elapsed_time":
-            message += "\n" + description.replace("_", " ").capitalize() + f": {items}"
+            parts.append(f"{description.replace('_', ' ').capitalize()}: {items}")
 
     # Returning to main
-    message += banner_message("Returning...")
-    return message
+    return "\n".join(parts) + banner_message("Returning...")
 
 
 def dry_run_message(dry_run: bool, message: str) -> str:
@@ -24,4 +21,5 @@ def dry_run_message(dry_run: bool, message: str) -> str:
 
 
 def banner_message(message: str, symbol: str = "-", length: int = 100):
-    return f"\n{symbol*length}\n{message}\n{symbol*length}"
+    line = symbol * length
+    return f"\n{line}\n{message}\n{line}"
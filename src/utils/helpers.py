@@ -1,6 +1,9 @@
 import logging
-import shutil
+import logging.handlers
+import os
+import sqlite3
 import sys
+from contextlib import closing
 from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
@@ -15,8 +18,37 @@ from constants.globals import LOG_DIR
 
 def index_files(directory: Path, extension: str, logger: logging.Logger) -> list[Path]:
     logger.info(f"Indexing {extension.upper()} files in {directory.resolve()}...")
+    suffix = f".{extension.lower()}"
+    suffix_length = len(suffix)
     try:
-        files = list(directory.rglob(f"*.{extension.lower()}"))
+        files = []
+        stack = [directory]
+        while stack:
+            path = stack.pop()
+            try:
+                entries = os.scandir(path)
+            except OSError as e:
+                # Skip unreadable (or vanished) subdirectories instead of aborting
+                if path == directory:
+                    raise
+                logger.warning(f"Skipping unreadable directory {path}: {e}")
+                continue
+            with entries:
+                for entry in entries:
+                    # Don't descend into directory symlinks (avoids loops); symlinked
+                    # files are still indexed, like rglob does
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif (
+                        entry.name[-suffix_length:].lower() == suffix
+                        and entry.is_file()
+                    ):
+                        files.append(entry)
+        # Inode order roughly follows on-disk order, so later reads are more sequential.
+        # DirEntry.inode() is free on POSIX but costs a system call per file on Windows.
+        if os.name == "posix":
+            files.sort(key=lambda entry: entry.inode())
+        files = [Path(entry.path) for entry in files]
         if not files:
             logger.info(f"No {extension.upper()} files found.")
         else:
@@ -27,60 +59,138 @@ def index_files(directory: Path, extension: str, logger: logging.Logger) -> list
         return []
 
 
+def load_cache(
+    path: Path,
+    table: str,
+    columns: list[str],
+    *,
+    logger: logging.Logger,
+    settings: str | None = None,
+) -> dict:
+    """
+    Read a sqlite cache table as {first column: (remaining columns)}.
+    If settings is given, the cache is only used if it was saved with the same settings.
+    Returns an empty dict if the cache is missing, unreadable or stale.
+    """
+    if not path.is_file():
+        return {}
+    try:
+        with closing(sqlite3.connect(path)) as conn:
+            if settings is not None:
+                row = conn.execute(
+                    "SELECT value FROM meta WHERE key = 'settings'"
+                ).fetchone()
+                if not row or row[0] != settings:
+                    return {}
+            query = f"SELECT {', '.join(columns)} FROM {table}"
+            return {key: tuple(values) for key, *values in conn.execute(query)}
+    except sqlite3.Error as e:
+        logger.warning(f"Failed to read cache {path.name}: {e}")
+        return {}
+
+
+def save_cache(
+    path: Path,
+    table: str,
+    columns: dict[str, str],
+    rows: list[tuple],
+    *,
+    logger: logging.Logger,
+    settings: str | None = None,
+):
+    """
+    Replace the contents of a sqlite cache table in a single transaction.
+    columns maps column names to SQL types; the first column is the primary key.
+    """
+    definitions = [f"{name} {sql_type}" for name, sql_type in columns.items()]
+    definitions[0] += " PRIMARY KEY"
+    placeholders = ", ".join("?" * len(columns))
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(sqlite3.connect(path)) as conn:
+            with conn:
+                if settings is not None:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS meta "
+                        "(key TEXT PRIMARY KEY, value TEXT)"
+                    )
+                    conn.execute(
+                        "INSERT OR REPLACE INTO meta VALUES ('settings', ?)",
+                        (settings,),
+                    )
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(definitions)})"
+                )
+                conn.execute(f"DELETE FROM {table}")
+                conn.executemany(
+                    f"INSERT INTO {table} VALUES ({placeholders})", rows
+                )
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Failed to write cache {path.name}: {e}")
+
+
+LOG_LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL,
+}
+
+
+def get_level(level_str: str) -> int:
+    """Convert a level name to its logging constant (INFO if invalid)."""
+    return LOG_LEVELS.get(level_str.upper(), logging.INFO)
+
+
+class ColorFormatter(logging.Formatter):
+    """Colorful console formatter."""
+
+    COLORS = {
+        logging.DEBUG: "\033[96m",
+        logging.INFO: "\033[92m",
+        logging.WARNING: "\033[93m",
+        logging.ERROR: "\033[91m",
+        logging.CRITICAL: "\033[95m",
+    }
+    RESET = "\033[0m"
+
+    def format(self, record):
+        color = self.COLORS.get(record.levelno, self.RESET)
+        return f"{color}{super().format(record)}{self.RESET}"
+
+
 def setup_logger(
     name: str,
     level: int = logging.DEBUG,
     console_level: str = "INFO",
     file_level: str = "DEBUG",
 ) -> logging.Logger:
-    # Helper to convert string level to logging constant
-    def get_level(level_str: str) -> int:
-        level_str = level_str.upper()
-        levels = {
-            "DEBUG": logging.DEBUG,
-            "INFO": logging.INFO,
-            "WARNING": logging.WARNING,
-            "ERROR": logging.ERROR,
-            "CRITICAL": logging.CRITICAL,
-        }
-        return levels.get(level_str, logging.INFO)  # Default INFO if invalid
-
-    # Colorful console formatter
-    class ColorFormatter(logging.Formatter):
-        COLORS = {
-            "DEBUG": "\033[96m",
-            "INFO": "\033[92m",
-            "WARNING": "\033[93m",
-            "ERROR": "\033[91m",
-            "CRITICAL": "\033[95m",
-            "RESET": "\033[0m",
-        }
-
-        def format(self, record):
-            color = self.COLORS.get(record.levelname, self.COLORS["RESET"])
-            message = super().format(record)
-            return f"{color}{message}{self.COLORS['RESET']}"
-
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
-    # Close and remove existing handlers properly
+    # Close and remove existing handlers properly (buffers flush into their target)
     for handler in logger.handlers[:]:
+        target = getattr(handler, "target", None)
         handler.close()
+        if target:
+            target.close()
         logger.removeHandler(handler)
 
-    # Setup log directory and file paths
-    log_dir = LOG_DIR / datetime.now().strftime("%Y-%m-%d")
-    log_dir.mkdir(parents=True, exist_ok=True)
+    # Setup log directory and file paths, all from one timestamp
+    now = datetime.now()
+    log_dir = LOG_DIR / now.strftime("%Y-%m-%d")
     log_file = log_dir / f"{name}.log"
     archive_dir = log_dir / "archive"
+    # Creates log_dir too
     archive_dir.mkdir(parents=True, exist_ok=True)
 
     # Archive old file
     if log_file.exists():
-        archive_file = archive_dir / f"{name}_{datetime.now().strftime('%H-%M-%S')}.log"
+        archive_file = archive_dir / f"{name}_{now.strftime('%H-%M-%S')}.log"
         try:
-            shutil.move(str(log_file), str(archive_file))
+            # Same directory tree, so a plain rename suffices
+            os.replace(log_file, archive_file)
             print(f"Moved existing log file to archive: {archive_file}")
         except PermissionError as e:
             print(f"Warning: Couldn't archive log file due to permission error: {e}")
@@ -92,14 +202,20 @@ def setup_logger(
     console_handler.setFormatter(console_formatter)
 
     # File handler
-    file_handler = logging.FileHandler(log_file)
+    file_handler = logging.FileHandler(log_file, encoding="utf-8", delay=True)
     file_handler.setLevel(get_level(file_level))
     file_formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
     file_handler.setFormatter(file_formatter)
 
+    # Buffer file records and write them in batches; errors are written immediately
+    buffered_file_handler = logging.handlers.MemoryHandler(
+        capacity=1024, flushLevel=logging.ERROR, target=file_handler
+    )
+    buffered_file_handler.setLevel(get_level(file_level))
+
     # Add handlers
     logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    logger.addHandler(buffered_file_handler)
 
     logger.propagate = False
 
@@ -187,7 +303,9 @@ def parallel_map(
                     else:
                         print(err_msg)
         finally:
-            executor.shutdown(wait=False)
+            # Wait for running tasks so a process pool's queues and semaphores are
+            # released here, not at interpreter exit; pending tasks are cancelled
+            executor.shutdown(wait=True, cancel_futures=True)
 
     return results
 
@@ -207,43 +325,45 @@ def get_config(
             return None
         raise ValueError(f'Missing required config key: "{key}"')
 
-    # Handle generic types like dict[str, str], list[int], etc.
+    # Non-generic type (e.g. str, int). Checked via get_origin: on Python 3.10
+    # isinstance(list[str], type) is True.
     origin = get_origin(expected_type)
-    args = get_args(expected_type)
-
-    if origin:
-        if not isinstance(value, origin):
-            raise TypeError(
-                f'"{key}" must be of type {origin.__name__}, got {type(value).__name__}.'
-            )
-
-        # Special handling for dicts
-        if origin is dict and len(args) == 2:
-            key_type, val_type = args
-            for k, v in value.items():
-                if not isinstance(k, key_type):
-                    raise TypeError(
-                        f'Key in "{key}" must be {key_type.__name__}, got {type(k).__name__}'
-                    )
-                if not isinstance(v, val_type):
-                    raise TypeError(
-                        f'Value in "{key}" must be {val_type.__name__}, got {type(v).__name__}'
-                    )
-
-        # Special handling for lists
-        elif origin is list and len(args) == 1:
-            item_type = args[0]
-            for item in value:
-                if not isinstance(item, item_type):
-                    raise TypeError(
-                        f'Item in "{key}" must be {item_type.__name__}, got {type(item).__name__}'
-                    )
-    else:
-        # Non-generic type (e.g. str, int)
+    if origin is None:
         if not isinstance(value, expected_type):
             raise TypeError(
                 f'"{key}" must be of type {expected_type.__name__}. Got {type(value).__name__}.'
             )
+        return value
+
+    # Handle generic types like dict[str, str], list[int], etc.
+    args = get_args(expected_type)
+
+    if not isinstance(value, origin):
+        raise TypeError(
+            f'"{key}" must be of type {origin.__name__}, got {type(value).__name__}.'
+        )
+
+    # Special handling for dicts
+    if origin is dict and len(args) == 2:
+        key_type, val_type = args
+        for k, v in value.items():
+            if not isinstance(k, key_type):
+                raise TypeError(
+                    f'Key in "{key}" must be {key_type.__name__}, got {type(k).__name__}'
+                )
+            if not isinstance(v, val_type):
+                raise TypeError(
+                    f'Value in "{key}" must be {val_type.__name__}, got {type(v).__name__}'
+                )
+
+    # Special handling for lists
+    elif origin is list and len(args) == 1:
+        item_type = args[0]
+        for item in value:
+            if not isinstance(item, item_type):
+                raise TypeError(
+                    f'Item in "{key}" must be {item_type.__name__}, got {type(item).__name__}'
+                )
 
     return value
 
@@ -274,8 +394,9 @@ class UpperFLAC:
         return getattr(self._flac, attr)
 
 
-def check_stop(stop_flag: Event, logger=None) -> bool:
-    if stop_flag and stop_flag.is_set():
+def check_stop(stop_flag: Event | None, logger=None) -> bool:
+    """Check if a stop was requested. stop_flag must be an Event or None."""
+    if stop_flag is not None and stop_flag.is_set():
         message = "Stop flag received. Exiting early."
         if logger:
             logger.warning(message)